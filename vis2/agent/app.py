@@ -1,4 +1,4 @@
-from voice_functions import download_mp3, generate_audio, make_call, transcribe_audio, get_completion_with_retries
+from voice_functions import download_mp3, generate_audio, make_call, get_call_status, transcribe_audio, get_completion_with_retries
 from flask import Flask, Response, request, send_file
 from twilio.rest import Client
 from twilio.twiml.voice_response import VoiceResponse
@@ -6,6 +6,9 @@ import os
 from dotenv import load_dotenv
 import logging
 import json
+import sys
+import threading
+import time
 
 app = Flask(__name__)
 
@@ -28,6 +31,11 @@ TO=os.getenv("TO")
 FROM_=os.getenv("FROM_")
 URL=os.getenv("URL")
 
+# Final call status is written here for the dashboard to pick up
+CALL_STATUS_FILE = os.path.join(os.path.dirname(__file__), "call_status.json")
+CALL_STATUS_POLL_INTERVAL = 5
+FINAL_CALL_STATUSES = ('completed', 'busy', 'no-answer', 'failed', 'canceled')
+
 
 @app.route('/handle-recording', methods=['POST'])
 def handle_recording():
@@ -133,8 +141,20 @@ if __name__ == '__main__':
         text = f.read()
     generate_audio(text, "current_response.mp3")
 
+    # Run the Flask server in the background while the call is in progress
+    server = threading.Thread(target=app.run, kwargs={'port': 8888}, daemon=True)
+    server.start()
+
     # Make the initial call
-    make_call(TO, FROM_, f"{URL}/initial")
-    
-    # Run the Flask server
-    app.run(port=8888)
\ No newline at end of file
+    call_sid = make_call(TO, FROM_, f"{URL}/initial")
+    if call_sid is None:
+        sys.exit(1)
+
+    # Wait for the call to end and report how it went
+    status = get_call_status(call_sid)
+    while status not in FINAL_CALL_STATUSES:
+        time.sleep(CALL_STATUS_POLL_INTERVAL)
+        status = get_call_status(call_sid)
+
+    with open(CALL_STATUS_FILE, 'w') as f:
+        json.dump({'sid': call_sid, 'status': status}, f, indent=4)
\ No newline at end of file
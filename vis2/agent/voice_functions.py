@@ -59,6 +59,9 @@ def make_call( to: str, from_: str, url: str, timeout: int = 2):
         to (str): The recipient's phone number
         from_ (str): Your Twilio phone number   
         url (str): The URL that forwards to the local server 
+
+    Returns:
+        str: The call SID, or None if the call could not be placed
     """
     time.sleep(timeout)  # Give the Flask server time to start
     try:
@@ -68,8 +71,26 @@ def make_call( to: str, from_: str, url: str, timeout: int = 2):
             url=url  # Update with your ngrok URL
         )
         print(f"Call initiated successfully. Call SID: {call.sid}")
+        return call.sid
     except Exception as e:
         print(f"Failed to initiate call: {e}")
+        return None
+
+
+def get_call_status(call_sid: str):
+    """Fetch the current status of a Twilio call.
+
+    Args:
+        call_sid (str): The SID returned by make_call
+
+    Returns:
+        str: Twilio call status (e.g. 'in-progress', 'completed', 'busy', 'no-answer'), or None on error
+    """
+    try:
+        return TWILIO_CLIENT.calls(call_sid).fetch().status
+    except Exception as e:
+        logger.error(f"Error fetching call status: {e}")
+        return None
 
 
 def download_mp3(url, username, password, output_filename, timeout=2):
@@ -6,6 +6,8 @@ from datetime import datetime
 from functools import wraps
 import secrets
 import subprocess
+import threading
+from scheduler import ANSWERED, BUSY, NO_ANSWER, CallScheduler
 
 app = Flask(__name__)
 app.secret_key = secrets.token_hex(16)
@@ -16,6 +18,16 @@ DATABASE = 'flask_app.db'
 # JSON file to store table data
 TABLE_DATA_FILE = 'table_data.json'
 INFO_FILE = "agent/info.json"
+CALL_STATUS_FILE = "agent/call_status.json"
+
+# Final Twilio call statuses mapped to scheduler outcomes
+CALL_OUTCOMES = {
+    'completed': ANSWERED,
+    'busy': BUSY,
+    'no-answer': NO_ANSWER,
+    'failed': NO_ANSWER,
+    'canceled': NO_ANSWER,
+}
 
 # Check if JSON file exists, create if not
 if not os.path.exists(TABLE_DATA_FILE):
@@ -43,6 +55,18 @@ def init_db():
         cursor.execute('INSERT INTO users (username, password) VALUES (?, ?)', ('admin', 'admin123'))
         cursor.execute('INSERT INTO users (username, password) VALUES (?, ?)', ('test', 'test123'))
     
+    # Create call schedule table if it doesn't exist
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS call_schedule (
+        entry_id TEXT PRIMARY KEY,
+        answered INTEGER NOT NULL DEFAULT 0,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        attempts_today INTEGER NOT NULL DEFAULT 0,
+        attempt_day TEXT,
+        eligible_at TEXT
+    )
+    ''')
+    
     conn.commit()
     conn.close()
 
@@ -65,6 +89,48 @@ def get_db_connection():
     conn.row_factory = sqlite3.Row
     return conn
 
+# Save the retry state of a debtor so restarts keep answered calls, daily caps and backoff
+def save_call_state(entry_id, state, answered=False):
+    state = state or {}
+    conn = get_db_connection()
+    conn.execute(
+        'INSERT OR REPLACE INTO call_schedule (entry_id, answered, attempts, attempts_today, attempt_day, eligible_at) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        (entry_id, int(answered), state.get('attempts', 0), state.get('attempts_today', 0),
+         state.get('attempt_day'), state.get('eligible_at'))
+    )
+    conn.commit()
+    conn.close()
+
+def delete_call_state(entry_id):
+    conn = get_db_connection()
+    conn.execute('DELETE FROM call_schedule WHERE entry_id = ?', (entry_id,))
+    conn.commit()
+    conn.close()
+
+# Load the debtors still to be called together with their saved retry state
+def load_call_scheduler():
+    scheduler = CallScheduler()
+    try:
+        with open(TABLE_DATA_FILE, 'r') as f:
+            table_data = json.load(f)
+    except (json.JSONDecodeError, FileNotFoundError):
+        table_data = []
+
+    conn = get_db_connection()
+    rows = conn.execute('SELECT * FROM call_schedule').fetchall()
+    conn.close()
+
+    answered = {row['entry_id'] for row in rows if row['answered']}
+    states = {row['entry_id']: dict(row) for row in rows if not row['answered']}
+    pending = [entry for entry in table_data if not isinstance(entry, dict) or entry.get('id') not in answered]
+    scheduler.add_many(pending, states)
+    return scheduler
+
+# Priority scheduler deciding which debtor is called next, shared between request threads
+call_scheduler = load_call_scheduler()
+scheduler_lock = threading.Lock()
+
 # Routes
 @app.route('/')
 def index():
@@ -195,19 +261,13 @@ def add_entry():
     with open(TABLE_DATA_FILE, 'w') as f:
         json.dump(table_data, f, indent=4)
 
-    with open(INFO_FILE, 'w') as f:
-        json.dump(new_entry, f, indent=4)
-    
+    with scheduler_lock:
+        call_scheduler.add(new_entry)
+    delete_call_state(entry_id)
+
     flash('Entry added successfully', 'success')
 
-    agent_script_path = os.path.join(os.path.dirname(__file__), 'agent', 'app.py')
-    try:
-        subprocess.run(
-            ["conda", "run", "-n", "vis2", "python", agent_script_path],
-            check=True
-        )
-    except subprocess.CalledProcessError as e:
-        flash(f'Error running agent/app.py: {e}', 'danger')
+    dispatch_next_call()
 
     return redirect(url_for('dashboard'))
 
@@ -226,12 +286,84 @@ def remove_entry(entry_id):
         else:
             with open(TABLE_DATA_FILE, 'w') as f:
                 json.dump(updated_data, f, indent=4)
+            with scheduler_lock:
+                call_scheduler.remove(entry_id)
+            delete_call_state(entry_id)
             flash('Entry removed successfully', 'success')
     except (json.JSONDecodeError, FileNotFoundError):
         flash('Error processing data file', 'danger')
     
     return redirect(url_for('dashboard'))
 
+@app.route('/call_next', methods=['POST'])
+@login_required
+def call_next():
+    dispatch_next_call()
+    return redirect(url_for('dashboard'))
+
+# Call the highest priority debtor if the scheduler allows a call right now
+def dispatch_next_call():
+    now = datetime.now()
+    with scheduler_lock:
+        entry = call_scheduler.next_call(now)
+        if entry is None:
+            wakeup = call_scheduler.next_wakeup(now)
+        else:
+            state = call_scheduler.account_state(entry['id'])
+
+    if entry is None:
+        if wakeup is not None:
+            flash(f'No call allowed right now, next call at {wakeup.strftime("%Y-%m-%d %H:%M")}', 'info')
+        return
+
+    # Count the attempt before calling, so a crash mid-call still respects the daily cap
+    save_call_state(entry['id'], state)
+
+    outcome = None
+    try:
+        with open(INFO_FILE, 'w') as f:
+            json.dump(entry, f, indent=4)
+        if os.path.exists(CALL_STATUS_FILE):
+            os.remove(CALL_STATUS_FILE)
+
+        agent_script_path = os.path.join(os.path.dirname(__file__), 'agent', 'app.py')
+        subprocess.run(
+            ["conda", "run", "-n", "vis2", "python", agent_script_path],
+            check=True
+        )
+        outcome = read_call_outcome()
+    except subprocess.CalledProcessError as e:
+        flash(f'Error running agent/app.py: {e}', 'danger')
+    except OSError as e:
+        flash(f'Could not start agent/app.py: {e}', 'danger')
+    finally:
+        # Every released call must be resolved, otherwise the debtor is never called again.
+        # Calls that never reached Twilio give the attempt back.
+        with scheduler_lock:
+            if outcome is None:
+                call_scheduler.cancel_call(entry['id'])
+            else:
+                call_scheduler.record_outcome(entry['id'], outcome, datetime.now())
+            state = call_scheduler.account_state(entry['id'])
+        if state is not None:
+            save_call_state(entry['id'], state)
+        elif outcome == ANSWERED:
+            save_call_state(entry['id'], None, answered=True)
+
+# Read the final call status written by the agent
+def read_call_outcome():
+    try:
+        with open(CALL_STATUS_FILE, 'r') as f:
+            status = json.load(f).get('status')
+    except (json.JSONDecodeError, FileNotFoundError, AttributeError):
+        flash('Agent did not report a call status', 'danger')
+        return None
+
+    if status not in CALL_OUTCOMES:
+        flash(f'Unknown call status: {status}', 'danger')
+        return None
+    return CALL_OUTCOMES[status]
+
 @app.route('/logout')
 def logout():
     session.clear()
@@ -0,0 +1,109 @@
+"""
+Simulated-clock benchmark for the call scheduler.
+
+Loads a large number of pending debtors, then replays calling days on a
+simulated clock with many parallel call slots: whenever a slot is free the
+next call is released, and when the simulated call ends a random outcome
+is reported. Runs until every debtor has answered or the simulated days
+are over, so the retry, backoff and daily cap paths all run at scale.
+Prints how many scheduling decisions per second the scheduler sustains.
+
+Usage:
+    python bench_scheduler.py [accounts] [days] [slots]
+"""
+import heapq
+import random
+import sys
+import time as timer
+from collections import Counter
+from datetime import datetime, timedelta
+
+from scheduler import ANSWERED, BUSY, NO_ANSWER, CallScheduler
+
+ACCOUNTS = 1_000_000
+DAYS = 7
+SLOTS = 2000  # Calls that can be in progress at the same time
+OUTCOME_WEIGHTS = ((ANSWERED, 0.3), (NO_ANSWER, 0.5), (BUSY, 0.2))
+CALL_SECONDS = {ANSWERED: (60, 300), NO_ANSWER: (25, 35), BUSY: (5, 10)}
+
+
+def make_entries(count: int, rng: random.Random):
+    """Generate random debtor records."""
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        date = start + timedelta(days=rng.randrange(365), seconds=rng.randrange(86400))
+        yield {
+            'name': f"debtor-{i}",
+            'id': str(i),
+            'money': round(rng.uniform(10, 50000), 2),
+            'date': date.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+
+def main():
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else ACCOUNTS
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else DAYS
+    slots = int(sys.argv[3]) if len(sys.argv) > 3 else SLOTS
+    rng = random.Random(42)
+    outcomes = [outcome for outcome, _ in OUTCOME_WEIGHTS]
+    weights = [weight for _, weight in OUTCOME_WEIGHTS]
+
+    scheduler = CallScheduler()
+
+    started = timer.perf_counter()
+    scheduler.add_many(make_entries(accounts, rng))
+    load_time = timer.perf_counter() - started
+    print(f"Loaded {accounts} accounts in {load_time:.2f}s")
+
+    now = datetime(2025, 3, 24, 0, 0)
+    end = now + timedelta(days=days)
+    # (ends_at, seq, entry_id, outcome) of calls in progress
+    in_progress = []
+    seq = 0
+    released = 0
+    results = Counter()
+    calls_per_day = Counter()
+
+    started = timer.perf_counter()
+    while now < end:
+        # Report every call that has ended by now
+        while in_progress and in_progress[0][0] <= now:
+            _, _, entry_id, outcome = heapq.heappop(in_progress)
+            scheduler.record_outcome(entry_id, outcome, now)
+            results[outcome] += 1
+
+        # Fill the free slots
+        while len(in_progress) < slots:
+            entry = scheduler.next_call(now)
+            if entry is None:
+                break
+            released += 1
+            calls_per_day[now.date()] += 1
+            outcome = rng.choices(outcomes, weights)[0]
+            duration = timedelta(seconds=rng.randint(*CALL_SECONDS[outcome]))
+            seq += 1
+            heapq.heappush(in_progress, (now + duration, seq, entry['id'], outcome))
+
+        # Jump to the next moment something can happen
+        candidates = []
+        if in_progress:
+            candidates.append(in_progress[0][0])
+        if len(in_progress) < slots:
+            wakeup = scheduler.next_wakeup(now)
+            if wakeup is not None and wakeup > now:
+                candidates.append(wakeup)
+        if not candidates:
+            break
+        now = min(candidates)
+    elapsed = timer.perf_counter() - started
+
+    print(f"Simulated until {now} with {slots} slots: {released} calls released")
+    print("Outcomes: " + ", ".join(f"{outcome} {count}" for outcome, count in sorted(results.items())))
+    print("Calls per day: " + ", ".join(f"{day} {count}" for day, count in sorted(calls_per_day.items())))
+    print(f"{len(scheduler)} accounts still pending")
+    print(f"Scheduling time {elapsed:.2f}s, {released / elapsed:,.0f} calls/s "
+          f"({elapsed / max(released, 1) * 1e6:.1f} us per release + outcome)")
+
+
+if __name__ == '__main__':
+    main()
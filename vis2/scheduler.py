@@ -0,0 +1,424 @@
+import heapq
+import itertools
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Call outcomes reported back to the scheduler
+ANSWERED = "answered"
+NO_ANSWER = "no_answer"
+BUSY = "busy"
+RETRY_OUTCOMES = (NO_ANSWER, BUSY)
+
+# Default scheduling configuration
+CALL_WINDOW_START = time(9, 0)
+CALL_WINDOW_END = time(20, 0)
+MAX_ATTEMPTS_PER_DAY = 3
+RETRY_BASE_DELAY = timedelta(minutes=30)
+RETRY_MAX_DELAY = timedelta(hours=4)
+MONEY_WEIGHT = 1.0
+OVERDUE_WEIGHT = 10.0
+
+DATE_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d')
+EPOCH = datetime(1970, 1, 1)
+
+
+def parse_entry_date(value: str) -> datetime:
+    """
+    Parse the `date` field of a debtor record.
+
+    Args:
+        value: Date string as stored in the table data file
+
+    Returns:
+        datetime: The parsed date
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised entry date: {value}")
+
+
+# Heap an account currently has its live entry in
+READY = "ready"
+WAITING = "waiting"
+
+
+class _Account:
+    __slots__ = ('entry', 'key', 'version', 'heap', 'attempts', 'attempts_today', 'attempt_day', 'eligible_at')
+
+    def __init__(self, entry: dict, key: float, version: int):
+        self.entry = entry
+        self.key = key
+        self.version = version
+        self.heap = None
+        self.attempts = 0
+        self.attempts_today = 0
+        self.attempt_day = None
+        self.eligible_at = None
+
+
+class CallScheduler:
+    """
+    Priority scheduler deciding which debtor to call next.
+
+    Pending debtors live in a ready heap ordered by score, debtors waiting
+    for a retry live in a second heap ordered by the time they become
+    eligible again. Both heaps use lazy deletion, so adding, removing and
+    selecting the next call are all O(log n). Versions come from one
+    scheduler wide counter, so entries left behind by a removed debtor never
+    match a re-added one, and a heap is rebuilt once its stale entries
+    outnumber the live ones.
+
+    The score is MONEY_WEIGHT * money + OVERDUE_WEIGHT * days_overdue.
+    Days overdue grow at the same rate for every debtor, so the ordering
+    only depends on money and the entry date and never has to be rebuilt.
+
+    All times are naive datetimes in the local time of the call centre.
+    The scheduler is not thread safe, callers sharing one must lock it.
+    """
+
+    def __init__(
+        self,
+        window_start: time = CALL_WINDOW_START,
+        window_end: time = CALL_WINDOW_END,
+        max_attempts_per_day: int = MAX_ATTEMPTS_PER_DAY,
+        retry_base_delay: timedelta = RETRY_BASE_DELAY,
+        retry_max_delay: timedelta = RETRY_MAX_DELAY,
+        money_weight: float = MONEY_WEIGHT,
+        overdue_weight: float = OVERDUE_WEIGHT,
+    ):
+        if window_start >= window_end:
+            raise ValueError("Calling window must start before it ends")
+        if max_attempts_per_day < 1:
+            raise ValueError("At least one attempt per day must be allowed")
+
+        self.window_start = window_start
+        self.window_end = window_end
+        self.max_attempts_per_day = max_attempts_per_day
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.money_weight = money_weight
+        self.overdue_weight = overdue_weight
+
+        self._accounts: Dict[str, _Account] = {}
+        self._in_flight: Dict[str, _Account] = {}
+        # (-key, seq, id, version) - heapq is a min-heap, so the key is negated
+        self._ready: List[Tuple[float, int, str, int]] = []
+        # (eligible_at, seq, id, version)
+        self._waiting: List[Tuple[datetime, int, str, int]] = []
+        self._ready_stale = 0
+        self._waiting_stale = 0
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    def __contains__(self, entry_id: str) -> bool:
+        return entry_id in self._accounts
+
+    def score(self, entry: dict) -> float:
+        """
+        Time independent priority key of a debtor record.
+
+        Args:
+            entry: Debtor record with `money` and `date` fields
+
+        Returns:
+            float: Higher values are called first
+        """
+        overdue_since = (parse_entry_date(entry['date']) - EPOCH).total_seconds() / 86400
+        return self.money_weight * float(entry['money']) - self.overdue_weight * overdue_since
+
+    def add(self, entry: dict, state: Optional[dict] = None):
+        """
+        Queue a debtor for calling.
+
+        Args:
+            entry: Debtor record with `id`, `money` and `date` fields
+            state: Optional state saved earlier with `account_state`
+        """
+        account = self._new_account(entry, state)
+        if account.eligible_at is not None:
+            self._wait(entry['id'], account, account.eligible_at)
+        else:
+            self._make_ready(entry['id'], account)
+
+    def add_many(self, entries: Iterable[dict], states: Optional[Dict[str, dict]] = None) -> int:
+        """
+        Queue many debtors at once, building the heaps in O(n).
+
+        Invalid records and duplicate IDs are logged and skipped.
+
+        Args:
+            entries: Debtor records with `id`, `money` and `date` fields
+            states: Optional saved states keyed by debtor ID
+
+        Returns:
+            int: Number of skipped records
+        """
+        states = states or {}
+        skipped = 0
+        try:
+            for entry in entries:
+                try:
+                    account = self._new_account(entry, states.get(entry.get('id')))
+                except (KeyError, ValueError, TypeError, AttributeError) as e:
+                    logger.error(f"Skipping debtor record {entry!r}: {e}")
+                    skipped += 1
+                    continue
+                entry_id = entry['id']
+                if account.eligible_at is not None:
+                    account.heap = WAITING
+                    self._waiting.append((account.eligible_at, next(self._seq), entry_id, account.version))
+                else:
+                    account.heap = READY
+                    self._ready.append((-account.key, next(self._seq), entry_id, account.version))
+        finally:
+            heapq.heapify(self._ready)
+            heapq.heapify(self._waiting)
+        return skipped
+
+    def account_state(self, entry_id: str) -> Optional[dict]:
+        """
+        Return the retry state of a debtor so it can survive a restart.
+
+        Args:
+            entry_id: The debtor ID
+
+        Returns:
+            dict: JSON friendly state accepted by `add`, or None if not scheduled
+        """
+        account = self._accounts.get(entry_id)
+        if account is None:
+            return None
+        return {
+            'attempts': account.attempts,
+            'attempts_today': account.attempts_today,
+            'attempt_day': account.attempt_day.isoformat() if account.attempt_day else None,
+            'eligible_at': account.eligible_at.isoformat(sep=' ') if account.eligible_at else None,
+        }
+
+    def remove(self, entry_id: str) -> bool:
+        """
+        Stop calling a debtor.
+
+        Args:
+            entry_id: The debtor ID
+
+        Returns:
+            bool: True if the debtor was scheduled
+        """
+        account = self._accounts.pop(entry_id, None)
+        if account is None:
+            return False
+
+        # Its heap entry, if any, is now stale
+        if account.heap == READY:
+            self._ready_stale += 1
+            if self._ready_stale > len(self._ready) - self._ready_stale:
+                self._ready = self._live_entries(self._ready)
+                self._ready_stale = 0
+        elif account.heap == WAITING:
+            self._waiting_stale += 1
+            if self._waiting_stale > len(self._waiting) - self._waiting_stale:
+                self._waiting = self._live_entries(self._waiting)
+                self._waiting_stale = 0
+        return True
+
+    def in_window(self, now: datetime) -> bool:
+        """Check whether calls may be placed at the given local time."""
+        return self.window_start <= now.time() < self.window_end
+
+    def next_window_start(self, now: datetime) -> datetime:
+        """Return the first moment at or after `now` that lies inside the calling window."""
+        start = datetime.combine(now.date(), self.window_start)
+        if now < start:
+            return start
+        if self.in_window(now):
+            return now
+        return start + timedelta(days=1)
+
+    def next_call(self, now: datetime) -> Optional[dict]:
+        """
+        Release the highest priority debtor that may be called now.
+
+        The debtor stays in flight until `record_outcome` is called for it.
+
+        Args:
+            now: Current local time
+
+        Returns:
+            dict: The debtor record, or None if nobody may be called now
+        """
+        if not self.in_window(now):
+            return None
+
+        self._promote_due(now)
+
+        while self._ready:
+            _, _, entry_id, version = heapq.heappop(self._ready)
+            account = self._accounts.get(entry_id)
+            if account is None or account.version != version:
+                self._ready_stale -= 1
+                continue
+            account.heap = None
+
+            if account.attempt_day != now.date():
+                account.attempt_day = now.date()
+                account.attempts_today = 0
+            elif account.attempts_today >= self.max_attempts_per_day:
+                # Restored after its last allowed attempt today
+                self._wait(entry_id, account, self._next_day_start(now))
+                continue
+
+            account.attempts_today += 1
+            account.attempts += 1
+            account.version = next(self._seq)
+            account.eligible_at = None
+            self._in_flight[entry_id] = account
+            return account.entry
+
+        return None
+
+    def record_outcome(self, entry_id: str, outcome: str, now: datetime):
+        """
+        Report how a released call went.
+
+        Answered calls leave the queue. No-answer and busy calls are retried
+        after an exponential backoff, but never more than the daily attempt
+        cap and never outside the calling window.
+
+        Args:
+            entry_id: The debtor ID
+            outcome: One of ANSWERED, NO_ANSWER or BUSY
+            now: Current local time
+        """
+        account = self._in_flight.pop(entry_id, None)
+        if account is None:
+            raise KeyError(f"No call in flight for debtor {entry_id}")
+        if self._accounts.get(entry_id) is not account:
+            return  # Removed, and possibly re-added, while the call was in flight
+
+        if outcome == ANSWERED:
+            self._accounts.pop(entry_id, None)
+            return
+        if outcome not in RETRY_OUTCOMES:
+            raise ValueError(f"Unknown call outcome: {outcome}")
+
+        if account.attempts_today >= self.max_attempts_per_day:
+            eligible_at = self._next_day_start(now)
+        else:
+            delay = min(
+                self.retry_base_delay * (2 ** (account.attempts_today - 1)),
+                self.retry_max_delay,
+            )
+            eligible_at = self.next_window_start(now + delay)
+
+        logger.info(f"Debtor {entry_id} {outcome}, retrying at {eligible_at}")
+        self._wait(entry_id, account, eligible_at)
+
+    def cancel_call(self, entry_id: str):
+        """
+        Give back a released call that never reached the debtor.
+
+        The attempt is not counted and the debtor is ready to be called again.
+
+        Args:
+            entry_id: The debtor ID
+        """
+        account = self._in_flight.pop(entry_id, None)
+        if account is None:
+            raise KeyError(f"No call in flight for debtor {entry_id}")
+        if self._accounts.get(entry_id) is not account:
+            return  # Removed, and possibly re-added, while the call was in flight
+
+        account.attempts -= 1
+        account.attempts_today -= 1
+        self._make_ready(entry_id, account)
+
+    def next_wakeup(self, now: datetime) -> Optional[datetime]:
+        """
+        Return when the next call can be released, or None if nothing is pending.
+
+        Args:
+            now: Current local time
+        """
+        self._promote_due(now)
+        while self._ready:
+            _, _, entry_id, version = self._ready[0]
+            account = self._accounts.get(entry_id)
+            if account is not None and account.version == version:
+                return self.next_window_start(now)
+            heapq.heappop(self._ready)
+            self._ready_stale -= 1
+        while self._waiting:
+            eligible_at, _, entry_id, version = self._waiting[0]
+            account = self._accounts.get(entry_id)
+            if account is not None and account.version == version:
+                return self.next_window_start(eligible_at)
+            heapq.heappop(self._waiting)
+            self._waiting_stale -= 1
+        return None
+
+    def _promote_due(self, now: datetime):
+        """Move debtors whose retry delay has passed back into the ready heap."""
+        while self._waiting and self._waiting[0][0] <= now:
+            _, _, entry_id, version = heapq.heappop(self._waiting)
+            account = self._accounts.get(entry_id)
+            if account is None or account.version != version:
+                self._waiting_stale -= 1
+                continue
+            self._make_ready(entry_id, account)
+
+    def _new_account(self, entry: dict, state: Optional[dict]) -> _Account:
+        """Validate a debtor record and register its account."""
+        entry_id = entry['id']
+        if entry_id in self._accounts:
+            raise ValueError(f"Debtor {entry_id} is already scheduled")
+
+        account = _Account(entry, self.score(entry), next(self._seq))
+        if state:
+            account.attempts = int(state.get('attempts') or 0)
+            account.attempts_today = int(state.get('attempts_today') or 0)
+            if state.get('attempt_day'):
+                account.attempt_day = date.fromisoformat(state['attempt_day'])
+            if state.get('eligible_at'):
+                account.eligible_at = datetime.fromisoformat(state['eligible_at'])
+
+        self._accounts[entry_id] = account
+        return account
+
+    def _make_ready(self, entry_id: str, account: _Account):
+        """Queue a debtor by score."""
+        account.heap = READY
+        heapq.heappush(self._ready, (-account.key, next(self._seq), entry_id, account.version))
+
+    def _wait(self, entry_id: str, account: _Account, eligible_at: datetime):
+        """Park a debtor until `eligible_at`."""
+        account.eligible_at = eligible_at
+        account.heap = WAITING
+        heapq.heappush(self._waiting, (eligible_at, next(self._seq), entry_id, account.version))
+
+    def _next_day_start(self, now: datetime) -> datetime:
+        """Return the start of the calling window on the day after `now`."""
+        return datetime.combine(now.date() + timedelta(days=1), self.window_start)
+
+    def _live_entries(self, heap: list) -> list:
+        """Rebuild a heap without its stale entries."""
+        live = []
+        for item in heap:
+            account = self._accounts.get(item[2])
+            if account is not None and account.version == item[3]:
+                live.append(item)
+        heapq.heapify(live)
+        return live
@@ -8,6 +8,16 @@ CREATE TABLE IF NOT EXISTS users (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Create call schedule table, keeps retry state of debtors across restarts
+CREATE TABLE IF NOT EXISTS call_schedule (
+    entry_id TEXT PRIMARY KEY,
+    answered INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    attempts_today INTEGER NOT NULL DEFAULT 0,
+    attempt_day TEXT,
+    eligible_at TEXT
+);
+
 -- Optional: Add some sample users for testing
 -- In a real app, you would hash the passwords
 INSERT INTO users (username, password) VALUES ('admin', 'admin123');
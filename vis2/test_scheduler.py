@@ -0,0 +1,220 @@
+from datetime import datetime, time, timedelta
+
+import pytest
+
+from scheduler import ANSWERED, BUSY, NO_ANSWER, CallScheduler
+
+DAY = datetime(2025, 3, 24)
+
+
+def at(hour, minute=0, days=0):
+    return DAY + timedelta(days=days, hours=hour, minutes=minute)
+
+
+def debtor(entry_id, money=100.0, date='2025-03-01 00:00:00'):
+    return {'name': entry_id, 'id': entry_id, 'money': money, 'date': date}
+
+
+def test_orders_by_amount_and_days_overdue():
+    scheduler = CallScheduler()
+    scheduler.add(debtor('small', money=100))
+    scheduler.add(debtor('large', money=5000))
+    scheduler.add(debtor('old', money=100, date='2024-01-01'))
+
+    released = [scheduler.next_call(at(10))['id'] for _ in range(3)]
+
+    assert released == ['large', 'old', 'small']
+
+
+def test_calls_only_inside_window():
+    scheduler = CallScheduler(window_start=time(9), window_end=time(20))
+    scheduler.add(debtor('a'))
+
+    assert scheduler.next_call(at(8, 59)) is None
+    assert scheduler.next_call(at(20)) is None
+    assert scheduler.next_wakeup(at(20)) == at(9, days=1)
+    assert scheduler.next_call(at(9))['id'] == 'a'
+
+
+def test_backoff_doubles_per_attempt():
+    scheduler = CallScheduler(retry_base_delay=timedelta(minutes=30), max_attempts_per_day=5)
+    scheduler.add(debtor('a'))
+
+    scheduler.next_call(at(10))
+    scheduler.record_outcome('a', NO_ANSWER, at(10))
+    assert scheduler.next_call(at(10, 29)) is None
+    assert scheduler.next_call(at(10, 30))['id'] == 'a'
+
+    scheduler.record_outcome('a', BUSY, at(10, 30))
+    assert scheduler.next_wakeup(at(10, 30)) == at(11, 30)
+
+
+def test_backoff_past_window_end_moves_to_next_morning():
+    scheduler = CallScheduler(retry_base_delay=timedelta(hours=1))
+    scheduler.add(debtor('a'))
+
+    scheduler.next_call(at(19, 30))
+    scheduler.record_outcome('a', NO_ANSWER, at(19, 30))
+
+    assert scheduler.next_wakeup(at(19, 30)) == at(9, days=1)
+
+
+def test_daily_cap_rolls_over_to_next_day():
+    scheduler = CallScheduler(max_attempts_per_day=2, retry_base_delay=timedelta(minutes=1))
+    scheduler.add(debtor('a'))
+
+    scheduler.next_call(at(10))
+    scheduler.record_outcome('a', NO_ANSWER, at(10))
+    scheduler.next_call(at(11))
+    scheduler.record_outcome('a', NO_ANSWER, at(11))
+
+    assert scheduler.next_call(at(15)) is None
+    assert scheduler.next_wakeup(at(15)) == at(9, days=1)
+    assert scheduler.next_call(at(9, days=1))['id'] == 'a'
+
+
+def test_answered_leaves_queue():
+    scheduler = CallScheduler()
+    scheduler.add(debtor('a'))
+
+    scheduler.next_call(at(10))
+    scheduler.record_outcome('a', ANSWERED, at(10))
+
+    assert len(scheduler) == 0
+    assert scheduler.next_wakeup(at(10)) is None
+
+
+def test_removed_debtor_is_skipped():
+    scheduler = CallScheduler()
+    scheduler.add(debtor('a', money=5000))
+    scheduler.add(debtor('b'))
+
+    assert scheduler.remove('a')
+    assert scheduler.next_call(at(10))['id'] == 'b'
+    assert scheduler.next_call(at(10)) is None
+
+
+def test_outcome_after_remove_and_re_add_keeps_new_account():
+    scheduler = CallScheduler()
+    scheduler.add(debtor('a'))
+    scheduler.next_call(at(10))
+
+    scheduler.remove('a')
+    scheduler.add(debtor('a', money=200))
+    scheduler.record_outcome('a', ANSWERED, at(10))
+
+    assert len(scheduler) == 1
+    assert scheduler.next_call(at(10))['money'] == 200
+
+
+def test_re_add_with_different_amount_uses_new_priority():
+    scheduler = CallScheduler()
+    scheduler.add(debtor('a', money=9000))
+    scheduler.add(debtor('b', money=500))
+
+    scheduler.remove('a')
+    scheduler.add(debtor('a', money=10))
+
+    assert [scheduler.next_call(at(10))['id'] for _ in range(2)] == ['b', 'a']
+    assert scheduler.next_call(at(10)) is None
+
+
+def test_re_add_while_retry_pending_keeps_own_backoff():
+    scheduler = CallScheduler(retry_base_delay=timedelta(minutes=30))
+    scheduler.add(debtor('a'))
+    scheduler.next_call(at(10))
+    scheduler.record_outcome('a', NO_ANSWER, at(10))
+
+    # The old retry at 10:30 must not release the re-added debtor
+    scheduler.remove('a')
+    scheduler.add(debtor('a'))
+    scheduler.next_call(at(10, 20))
+    scheduler.record_outcome('a', NO_ANSWER, at(10, 20))
+
+    assert scheduler.next_call(at(10, 30)) is None
+    assert scheduler.next_wakeup(at(10, 30)) == at(10, 50)
+    assert scheduler.next_call(at(10, 50))['id'] == 'a'
+
+
+def test_heaps_are_compacted_after_removals():
+    scheduler = CallScheduler()
+    scheduler.add_many(debtor(str(i), money=i) for i in range(100))
+    for i in range(5):
+        scheduler.next_call(at(10))
+        scheduler.record_outcome(str(99 - i), NO_ANSWER, at(10))
+
+    for i in range(90):
+        scheduler.remove(str(i))
+
+    assert len(scheduler._ready) <= 2 * 5 + 1
+    assert len(scheduler._waiting) == 5
+    for i in range(95, 100):
+        scheduler.remove(str(i))
+    assert len(scheduler._waiting) <= 1
+    assert [scheduler.next_call(at(10))['id'] for _ in range(5)] == ['94', '93', '92', '91', '90']
+
+
+def test_cancelled_call_gives_attempt_back():
+    scheduler = CallScheduler(max_attempts_per_day=1)
+    scheduler.add(debtor('a'))
+
+    scheduler.next_call(at(10))
+    scheduler.cancel_call('a')
+
+    assert scheduler.account_state('a')['attempts_today'] == 0
+    assert scheduler.next_call(at(10))['id'] == 'a'
+
+
+def test_unresolved_release_blocks_debtor():
+    scheduler = CallScheduler()
+    scheduler.add(debtor('a'))
+    scheduler.next_call(at(10))
+
+    assert scheduler.next_call(at(10)) is None
+    scheduler.record_outcome('a', NO_ANSWER, at(10))
+    assert scheduler.next_wakeup(at(10)) is not None
+
+
+def test_record_outcome_without_release_raises():
+    scheduler = CallScheduler()
+    scheduler.add(debtor('a'))
+
+    with pytest.raises(KeyError):
+        scheduler.record_outcome('a', ANSWERED, at(10))
+
+
+def test_add_many_skips_invalid_records():
+    scheduler = CallScheduler()
+    entries = [
+        debtor('a', money=300),
+        {'name': 'no date', 'id': 'b', 'money': 10},
+        debtor('c', money='lots'),
+        debtor('a', money=999),
+        debtor('d', money=200),
+    ]
+
+    assert scheduler.add_many(entries) == 3
+    assert len(scheduler) == 2
+    assert [scheduler.next_call(at(10))['id'] for _ in range(2)] == ['a', 'd']
+
+
+def test_state_restore_keeps_cap_and_backoff():
+    scheduler = CallScheduler(max_attempts_per_day=2, retry_base_delay=timedelta(minutes=30))
+    scheduler.add(debtor('a', money=5000))
+    scheduler.add(debtor('b'))
+    scheduler.next_call(at(9))
+    scheduler.record_outcome('a', NO_ANSWER, at(9))
+    scheduler.next_call(at(9))
+    scheduler.record_outcome('b', NO_ANSWER, at(9))
+    # 'a' uses its last attempt for today, then the process restarts mid-call
+    assert scheduler.next_call(at(9, 30))['id'] == 'a'
+    states = {entry_id: scheduler.account_state(entry_id) for entry_id in ('a', 'b')}
+
+    restored = CallScheduler(max_attempts_per_day=2, retry_base_delay=timedelta(minutes=30))
+    restored.add_many([debtor('a', money=5000), debtor('b')], states)
+
+    assert restored.next_call(at(9, 15)) is None
+    assert restored.next_call(at(9, 30))['id'] == 'b'
+    assert restored.next_call(at(9, 30)) is None
+    assert restored.next_wakeup(at(9, 30)) == at(9, days=1)
+    assert restored.next_call(at(9, days=1))['id'] == 'a'